@@ -0,0 +1,154 @@
+"""快捷键匹配索引
+
+在配置加载时预先计算每个快捷键/文本片段的按键集合，
+监听器回调中直接复用，避免每次按键都重新构造 set。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from hotkey.config import (
+    GlobalHotkeySettings,
+    HotkeyConfig,
+    MouseButtonConfig,
+    TextSnippetConfig,
+)
+
+# 修饰键（内部统一键名）
+MODIFIER_KEYS: FrozenSet[str] = frozenset(
+    {
+        "ctrl",
+        "right_ctrl",
+        "super",
+        "right_super",
+        "alt",
+        "right_alt",
+        "shift",
+        "right_shift",
+    }
+)
+
+
+@dataclass(frozen=True)
+class HotkeyEntry:
+    """预计算后的键盘快捷键"""
+
+    hotkey_id: str
+    config: HotkeyConfig
+    keys: FrozenSet[str]
+    mask: int  # keys 对应的位掩码
+    non_modifier_mask: int  # 非修饰键的位掩码，按住模式下只有这些键允许触发 release
+
+
+@dataclass(frozen=True)
+class SnippetEntry:
+    """预计算后的文本片段快捷键"""
+
+    snippet_id: str
+    config: TextSnippetConfig
+    keys: FrozenSet[str]
+
+
+def _translate_keys(
+    keys: Iterable[str], key_map: Optional[Mapping[str, str]]
+) -> FrozenSet[str]:
+    if key_map is None:
+        return frozenset(keys)
+    return frozenset(key_map.get(k, k) for k in keys)
+
+
+class HotkeyIndex:
+    """由 GlobalHotkeySettings 构建的只读匹配索引
+
+    key_map 用于把内部键名转换为监听器使用的键名（如 macOS 的 control/command），
+    modifier_keys 为转换后的修饰键集合。
+
+    hotkeys_by_key / snippets_by_key 是键名到候选项的倒排索引：
+    按下或释放某个键时只需检查包含该键的快捷键，而不必遍历全部配置。
+
+    snippets_by_combo 以完整按键集合为键：文本片段要求精确匹配，
+    按下时直接用当前按下的键集合查表；snippet_sizes 用于在集合大小不可能匹配时跳过查表。
+
+    middle_button_hotkeys 为绑定鼠标中键且已启用的配置 (id, config)，鼠标事件中直接遍历。
+
+    key_bits 为配置中出现的每个键分配一个二进制位，监听器用整数维护按下状态，
+    子集判断变为 (pressed_mask & entry.mask) == entry.mask。
+    未出现在任何配置中的键没有对应的位（key_bits.get 返回 0）。
+
+    索引只收录 enabled 的配置，回调中无需再逐个跳过被禁用的项。
+    配置（包括 enabled 开关）变化时需要重新构建索引：
+    HotkeyManager.update_config 会用新配置重建监听器。
+    """
+
+    def __init__(
+        self,
+        config: GlobalHotkeySettings,
+        key_map: Optional[Mapping[str, str]] = None,
+        modifier_keys: FrozenSet[str] = MODIFIER_KEYS,
+    ) -> None:
+        self.hotkeys_by_key: Dict[str, List[HotkeyEntry]] = {}
+        self.snippets_by_key: Dict[str, List[SnippetEntry]] = {}
+        self.snippets_by_combo: Dict[FrozenSet[str], List[SnippetEntry]] = {}
+        self.key_bits: Dict[str, int] = {}
+
+        enabled_hotkeys = {
+            hotkey_id: hk_config
+            for hotkey_id, hk_config in config.keyboard_hotkeys.items()
+            if hk_config.enabled
+        }
+        enabled_snippets = {
+            snip_id: snip_config
+            for snip_id, snip_config in config.text_snippets.items()
+            if snip_config.enabled
+        }
+
+        hotkey_keys = {
+            hotkey_id: _translate_keys(hk_config.keys, key_map)
+            for hotkey_id, hk_config in enabled_hotkeys.items()
+        }
+        snippet_keys = {
+            snip_id: _translate_keys(snip_config.keys, key_map)
+            for snip_id, snip_config in enabled_snippets.items()
+        }
+        for keys in (*hotkey_keys.values(), *snippet_keys.values()):
+            for key in sorted(keys):
+                if key not in self.key_bits:
+                    self.key_bits[key] = 1 << len(self.key_bits)
+
+        for hotkey_id, hk_config in enabled_hotkeys.items():
+            keys = hotkey_keys[hotkey_id]
+            entry = HotkeyEntry(
+                hotkey_id=hotkey_id,
+                config=hk_config,
+                keys=keys,
+                mask=self.mask_of(keys),
+                non_modifier_mask=self.mask_of(keys - modifier_keys),
+            )
+            for key in keys:
+                self.hotkeys_by_key.setdefault(key, []).append(entry)
+
+        for snip_id, snip_config in enabled_snippets.items():
+            keys = snippet_keys[snip_id]
+            snip_entry = SnippetEntry(
+                snippet_id=snip_id,
+                config=snip_config,
+                keys=keys,
+            )
+            for key in keys:
+                self.snippets_by_key.setdefault(key, []).append(snip_entry)
+            self.snippets_by_combo.setdefault(keys, []).append(snip_entry)
+
+        self.snippet_sizes: FrozenSet[int] = frozenset(len(k) for k in self.snippets_by_combo)
+
+        self.middle_button_hotkeys: List[Tuple[str, MouseButtonConfig]] = [
+            (mb_id, mb_config)
+            for mb_id, mb_config in config.mouse_hotkeys.items()
+            if mb_config.enabled and mb_config.button == "middle"
+        ]
+
+    def mask_of(self, keys: Iterable[str]) -> int:
+        """计算一组键的位掩码（忽略未分配位的键）"""
+        mask = 0
+        for key in keys:
+            mask |= self.key_bits.get(key, 0)
+        return mask
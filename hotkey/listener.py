@@ -2,16 +2,59 @@
 
 import sys
 import threading
-import time
-from typing import Dict, Optional, Set
+from typing import Dict, Optional
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from hotkey.config import GlobalHotkeySettings
+from hotkey.index import HotkeyIndex
+from hotkey.matcher import HotkeyMatcher
 
 # macOS 平台检测
 _IS_MACOS = sys.platform == "darwin"
 
+# pynput 在模块导入时加载一次，事件回调中不再重复 import；
+# 导入失败时由 run() 通过 listener_error 提示用户
+_PYNPUT_IMPORT_ERROR: Optional[ImportError] = None
+try:
+    from pynput import keyboard as _keyboard
+    from pynput import mouse as _mouse
+except ImportError as e:
+    _keyboard = _mouse = None
+    _PYNPUT_IMPORT_ERROR = e
+
+# pynput 特殊键 -> 标准键名
+_SPECIAL_MAP: Dict[object, str] = {}
+if _keyboard is not None:
+    _SPECIAL_MAP.update({
+        _keyboard.Key.ctrl_l: "ctrl",
+        _keyboard.Key.ctrl: "ctrl",  # 通用Ctrl
+        _keyboard.Key.ctrl_r: "right_ctrl",
+        _keyboard.Key.cmd: "super",  # Linux/Mac/Windows
+        _keyboard.Key.cmd_l: "super",
+        _keyboard.Key.cmd_r: "right_super",
+        _keyboard.Key.alt_l: "alt",
+        _keyboard.Key.alt: "alt",
+        _keyboard.Key.alt_r: "right_alt",
+        _keyboard.Key.shift: "shift",
+        _keyboard.Key.shift_l: "shift",
+        _keyboard.Key.shift_r: "right_shift",
+        _keyboard.Key.space: "space",
+        _keyboard.Key.enter: "enter",
+        _keyboard.Key.tab: "tab",
+        _keyboard.Key.esc: "esc",
+        _keyboard.Key.backspace: "backspace",
+        _keyboard.Key.delete: "delete",
+        _keyboard.Key.home: "home",
+        _keyboard.Key.end: "end",
+        _keyboard.Key.page_up: "page_up",
+        _keyboard.Key.page_down: "page_down",
+        _keyboard.Key.up: "up",
+        _keyboard.Key.down: "down",
+        _keyboard.Key.left: "left",
+        _keyboard.Key.right: "right",
+    })
+
 
 class HotkeyListenerThread(QThread):
     """在独立线程中运行pynput监听器"""
@@ -24,14 +67,14 @@ class HotkeyListenerThread(QThread):
 
     def __init__(self, config: GlobalHotkeySettings) -> None:
         super().__init__()
-        self._config = config
+        self._index = HotkeyIndex(config)
         self._stop_event = threading.Event()
         self._keyboard_listener: Optional[object] = None
         self._mouse_listener: Optional[object] = None
 
-        # 状态跟踪
-        self._pressed_keys: Set[str] = set()
-        self._active_combos: Dict[str, bool] = {}  # 正在激活的组合键
+        # 状态跟踪（按下状态与已激活的组合键由 HotkeyMatcher 维护）
+        self._matcher = HotkeyMatcher(self._index)
+        self._key_cache: Dict[object, str] = {}  # pynput按键 -> 标准键名
 
     def stop(self) -> None:
         """请求停止监听器"""
@@ -50,23 +93,23 @@ class HotkeyListenerThread(QThread):
     def run(self) -> None:
         """主线程循环 - 运行pynput监听器"""
         try:
-            from pynput import keyboard, mouse
+            if _PYNPUT_IMPORT_ERROR is not None:
+                raise _PYNPUT_IMPORT_ERROR
 
             # 创建键盘监听器
-            self._keyboard_listener = keyboard.Listener(
+            self._keyboard_listener = _keyboard.Listener(
                 on_press=self._on_key_press, on_release=self._on_key_release
             )
 
             # 创建鼠标监听器
-            self._mouse_listener = mouse.Listener(on_click=self._on_mouse_click)
+            self._mouse_listener = _mouse.Listener(on_click=self._on_mouse_click)
 
             # 启动监听器
             self._keyboard_listener.start()
             self._mouse_listener.start()
 
-            # 等待停止信号
-            while not self._stop_event.is_set():
-                time.sleep(0.1)
+            # 等待停止信号（监听器运行在 pynput 自己的线程中，这里直接阻塞）
+            self._stop_event.wait()
 
         except ImportError as e:
             self.listener_error.emit(f"无法导入pynput库: {e}\n请运行: pip install pynput")
@@ -96,107 +139,49 @@ class HotkeyListenerThread(QThread):
 
     def _normalize_key(self, key) -> str:
         """将pynput按键转换为标准字符串"""
-        try:
-            from pynput import keyboard
-
-            # 特殊键映射
-            special_map = {
-                keyboard.Key.ctrl_l: "ctrl",
-                keyboard.Key.ctrl: "ctrl",  # 通用Ctrl
-                keyboard.Key.ctrl_r: "right_ctrl",
-                keyboard.Key.cmd: "super",  # Linux/Mac/Windows
-                keyboard.Key.cmd_l: "super",
-                keyboard.Key.cmd_r: "right_super",
-                keyboard.Key.alt_l: "alt",
-                keyboard.Key.alt: "alt",
-                keyboard.Key.alt_r: "right_alt",
-                keyboard.Key.shift: "shift",
-                keyboard.Key.shift_l: "shift",
-                keyboard.Key.shift_r: "right_shift",
-                keyboard.Key.space: "space",
-                keyboard.Key.enter: "enter",
-                keyboard.Key.tab: "tab",
-                keyboard.Key.esc: "esc",
-                keyboard.Key.backspace: "backspace",
-                keyboard.Key.delete: "delete",
-                keyboard.Key.home: "home",
-                keyboard.Key.end: "end",
-                keyboard.Key.page_up: "page_up",
-                keyboard.Key.page_down: "page_down",
-                keyboard.Key.up: "up",
-                keyboard.Key.down: "down",
-                keyboard.Key.left: "left",
-                keyboard.Key.right: "right",
-            }
-
-            # 检查特殊键
-            if key in special_map:
-                return special_map[key]
-
-            # 字母数字键
-            if hasattr(key, "char") and key.char:
-                return key.char.lower()
-
-            # 功能键
-            key_str = str(key).lower()
-            if key_str.startswith("key."):
-                return key_str[4:]  # 移除"key."前缀
-
-            return key_str
+        vk = getattr(key, "vk", None)
+        if vk is None:
+            # 特殊键（pynput Key 枚举）直接查表
+            key_name = _SPECIAL_MAP.get(key)
+            if key_name is not None:
+                return key_name
+            cache_key = key
+        else:
+            # KeyCode 按 (vk, char) 缓存，避免依赖其基于 repr 的 __hash__
+            cache_key = (vk, getattr(key, "char", None))
+
+        key_name = self._key_cache.get(cache_key)
+        if key_name is None:
+            key_name = self._compute_key_name(key)
+            self._key_cache[cache_key] = key_name
+        return key_name
 
+    @staticmethod
+    def _compute_key_name(key) -> str:
+        """计算非特殊键的标准键名（结果由 _normalize_key 缓存）"""
+        # 字母数字键
+        try:
+            char = getattr(key, "char", None)
+            if char:
+                return char.lower()
         except Exception:
-            return str(key).lower()
+            pass
 
-    @staticmethod
-    def _modifier_keys() -> Set[str]:
-        return {
-            "ctrl",
-            "right_ctrl",
-            "super",
-            "right_super",
-            "alt",
-            "right_alt",
-            "shift",
-            "right_shift",
-        }
+        # 功能键
+        key_str = str(key).lower()
+        if key_str.startswith("key."):
+            return key_str[4:]  # 移除"key."前缀
+
+        return key_str
 
     def _on_key_press(self, key) -> None:
         """处理按键按下"""
         try:
-            key_name = self._normalize_key(key)
-            self._pressed_keys.add(key_name)
-
-            # 检查所有配置的快捷键
-            for hotkey_id, config in self._config.keyboard_hotkeys.items():
-                if not config.enabled:
-                    continue
-
-                required_keys = set(config.keys)
-                if required_keys.issubset(self._pressed_keys):
-                    # 组合键匹配！
-                    if hotkey_id not in self._active_combos:
-                        self._active_combos[hotkey_id] = True
-
-                        if config.mode == "hold":
-                            # 按住模式 - 发送press事件
-                            self.hotkey_pressed.emit(hotkey_id, "press")
-                        else:
-                            # toggle模式 - 发送toggle事件
-                            self.hotkey_pressed.emit(hotkey_id, "toggle")
-
-            # 检查文本片段快捷键
-            for snip_id, snip_config in self._config.text_snippets.items():
-                if not snip_config.enabled:
-                    continue
-
-                required_keys = set(snip_config.keys)
-                # 精确匹配：按下的键必须完全等于配置的键
-                if required_keys == self._pressed_keys:
-                    # 片段快捷键触发（一次性，不需要跟踪active状态）
-                    snip_key = f"snippet:{snip_id}"
-                    if snip_key not in self._active_combos:
-                        self._active_combos[snip_key] = True
-                        self.snippet_triggered.emit(snip_id, snip_config.text)
+            for kind, item_id, arg in self._matcher.press(self._normalize_key(key)):
+                if kind == "hotkey":
+                    self.hotkey_pressed.emit(item_id, arg)
+                else:
+                    self.snippet_triggered.emit(item_id, arg)
 
         except Exception as e:
             self.listener_error.emit(f"按键处理错误: {e}")
@@ -204,36 +189,9 @@ class HotkeyListenerThread(QThread):
     def _on_key_release(self, key) -> None:
         """处理按键释放"""
         try:
-            key_name = self._normalize_key(key)
-            modifier_keys = self._modifier_keys()
-
-            # 检查是否释放了激活的组合键
-            for hotkey_id, config in self._config.keyboard_hotkeys.items():
-                if hotkey_id in self._active_combos and key_name in config.keys:
-                    if config.mode == "hold":
-                        non_modifier_keys = {k for k in config.keys if k not in modifier_keys}
-                        if non_modifier_keys:
-                            # 只允许非修饰键触发release，避免修饰键被清理导致误触发
-                            if key_name not in non_modifier_keys:
-                                continue
-                            remaining = set(self._pressed_keys)
-                            remaining.discard(key_name)
-                            if remaining.intersection(non_modifier_keys):
-                                continue
-                    # 释放了组合键的一部分
-                    del self._active_combos[hotkey_id]
-
-                    if config.mode == "hold":
-                        # 按住模式 - 发送release事件
-                        self.hotkey_pressed.emit(hotkey_id, "release")
-
-            # 清理片段快捷键的 active 状态
-            for snip_id, snip_config in self._config.text_snippets.items():
-                snip_key = f"snippet:{snip_id}"
-                if snip_key in self._active_combos and key_name in snip_config.keys:
-                    del self._active_combos[snip_key]
-
-            self._pressed_keys.discard(key_name)
+            # 释放只会产生 hotkey 动作
+            for _kind, hotkey_id, action in self._matcher.release(self._normalize_key(key)):
+                self.hotkey_pressed.emit(hotkey_id, action)
 
         except Exception as e:
             self.listener_error.emit(f"按键释放处理错误: {e}")
@@ -241,19 +199,12 @@ class HotkeyListenerThread(QThread):
     def _on_mouse_click(self, x: int, y: int, button, pressed: bool) -> None:
         """处理鼠标点击"""
         try:
-            from pynput import mouse
-
             # 只处理鼠标中键
-            if button != mouse.Button.middle:
+            if button != _mouse.Button.middle:
                 return  # 忽略其他按钮
 
-            button_name = "middle"
-
             # 检查配置的鼠标按键
-            for mb_id, config in self._config.mouse_hotkeys.items():
-                if not config.enabled or config.button != button_name:
-                    continue
-
+            for mb_id, config in self._index.middle_button_hotkeys:
                 if pressed:
                     # 按下
                     if config.mode == "hold":
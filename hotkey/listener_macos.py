@@ -2,14 +2,54 @@
 
 import logging
 import threading
-from typing import Dict, Optional, Set
+from typing import Iterable, List, Optional, Set, Tuple
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from hotkey.config import GlobalHotkeySettings
+from hotkey.index import HotkeyIndex
 
 LOG = logging.getLogger(__name__)
 
+# 内部键名 -> macOS 键名（配置加载时转换一次，见 _build_index）
+_MACOS_KEY_MAP = {
+    "ctrl": "control",
+    "super": "command",
+    "alt": "option",
+    "shift": "shift",
+}
+_MACOS_MODIFIER_KEYS = frozenset(_MACOS_KEY_MAP.values())
+
+# macOS 虚拟键码 -> 键名
+_KEYCODE_MAP = {
+    0: "a", 1: "s", 2: "d", 3: "f", 4: "h", 5: "g", 6: "z", 7: "x",
+    8: "c", 9: "v", 11: "b", 12: "q", 13: "w", 14: "e", 15: "r",
+    16: "y", 17: "t", 18: "1", 19: "2", 20: "3", 21: "4", 22: "6",
+    23: "5", 24: "=", 25: "9", 26: "7", 27: "-", 28: "8", 29: "0",
+    31: "o", 32: "u", 34: "i", 35: "p", 37: "l", 38: "j", 40: "k",
+    45: "n", 46: "m",
+    36: "enter", 48: "tab", 49: "space", 51: "backspace", 53: "esc",
+    122: "f1", 120: "f2", 99: "f3", 118: "f4", 96: "f5", 97: "f6",
+    98: "f7", 100: "f8", 101: "f9", 109: "f10", 103: "f11", 111: "f12",
+}
+
+# 按键码直接索引的查找表（0..127，未映射的键码为 None）
+_KEYCODE_TABLE: Tuple[Optional[str], ...] = tuple(
+    _KEYCODE_MAP.get(code) for code in range(128)
+)
+
+
+def _keycode_to_name(keycode: int) -> Optional[str]:
+    """将 macOS 虚拟键码转换为键名"""
+    return _KEYCODE_TABLE[keycode] if 0 <= keycode < 128 else None
+
+
+# RunLoop 阻塞等待的超时时间（秒）：空闲时不再定时唤醒，停止时由 stop() 唤醒
+_RUN_LOOP_TIMEOUT = 1e9
+
+# 每次 RunLoop 唤醒后最多连续处理的就绪事件数，之后统一发送信号
+_MAX_EVENTS_PER_TICK = 32
+
 # 全局权限检查标志：程序启动后只在第一次调用时检查权限
 _accessibility_checked = False
 _accessibility_granted = False
@@ -72,31 +112,39 @@ class MacOSHotkeyListenerThread(QThread):
 
     def __init__(self, config: GlobalHotkeySettings) -> None:
         super().__init__()
-        self._config = config
+        self._index = self._build_index(config)
         self._stop_event = threading.Event()
         self._tap = None
+        self._run_loop = None
+
+    @staticmethod
+    def _build_index(config: GlobalHotkeySettings) -> HotkeyIndex:
+        """构建使用 macOS 键名的匹配索引
 
-    def update_config(self, config: GlobalHotkeySettings) -> None:
-        """更新配置"""
-        self._config = config
+        内部键名: ctrl, super, alt, shift
+        macOS 键名: control, command, option, shift
+        """
+        return HotkeyIndex(config, key_map=_MACOS_KEY_MAP, modifier_keys=_MACOS_MODIFIER_KEYS)
 
     def stop(self) -> None:
         """请求停止监听器"""
         self._stop_event.set()
+        run_loop = self._run_loop
+        if run_loop is None:
+            return
+        try:
+            import Quartz
 
-    def _convert_keys_to_macos(self, keys: list) -> Set[str]:
-        """将内部键名转换为 macOS 键名
-
-        内部键名: ctrl, super, alt, shift
-        macOS 键名: control, command, option, shift
-        """
-        key_map = {
-            "ctrl": "control",
-            "super": "command",
-            "alt": "option",
-            "shift": "shift",
-        }
-        return {key_map.get(k, k) for k in keys}
+            # 在 RunLoop 线程内执行 CFRunLoopStop：即使此时还未进入阻塞等待，
+            # 该 block 也会在下一次 RunLoop 运行时执行，不会丢失停止请求
+            Quartz.CFRunLoopPerformBlock(
+                run_loop,
+                Quartz.kCFRunLoopDefaultMode,
+                lambda: Quartz.CFRunLoopStop(run_loop),
+            )
+            Quartz.CFRunLoopWakeUp(run_loop)
+        except Exception as e:
+            LOG.error(f"Failed to wake run loop: {e}")
 
     def run(self) -> None:
         """主线程循环 - 运行 Quartz 事件监听"""
@@ -104,8 +152,9 @@ class MacOSHotkeyListenerThread(QThread):
         check_accessibility_once()
 
         try:
-            import Quartz
             from Quartz import (
+                CGEventGetFlags,
+                CGEventGetIntegerValueField,
                 CGEventTapCreate,
                 CGEventTapEnable,
                 CGEventTapIsEnabled,
@@ -120,7 +169,19 @@ class MacOSHotkeyListenerThread(QThread):
                 kCGEventFlagsChanged,
                 kCGEventOtherMouseDown,
                 kCGEventOtherMouseUp,
+                kCGEventTapDisabledByTimeout,
+                kCGEventTapDisabledByUserInput,
+                kCGEventFlagMaskAlternate,
+                kCGEventFlagMaskCommand,
+                kCGEventFlagMaskControl,
+                kCGEventFlagMaskShift,
+                kCGKeyboardEventAutorepeat,
+                kCGKeyboardEventKeycode,
+                kCGMouseEventButtonNumber,
+                CFRunLoopRunInMode,
                 kCFRunLoopCommonModes,
+                kCFRunLoopDefaultMode,
+                kCFRunLoopRunHandledSource,
             )
         except ImportError as e:
             self.listener_error.emit(
@@ -129,10 +190,55 @@ class MacOSHotkeyListenerThread(QThread):
             )
             return
 
+        # 匹配索引在监听器生命周期内不变（配置变化时 HotkeyManager 会重建监听器）
+        index = self._index
+        modifier_bits = index.mask_of(_MACOS_MODIFIER_KEYS)
+
         # 状态跟踪
         pressed_keys: Set[str] = set()
-        active_combos: Dict[str, bool] = {}
+        pressed_mask = 0  # pressed_keys 的位掩码（见 HotkeyIndex.key_bits）
+        active_hotkeys: Set[str] = set()  # 正在激活的组合键
+        active_snippets: Set[str] = set()  # 已触发、尚未释放的文本片段 id
         last_modifiers: Set[str] = set()
+        # 上一次 FlagsChanged 事件中的修饰键标志位（只保留 control/command/option/shift）
+        last_flags = 0
+        # 上次检查文本片段后是否释放过按键：剩余按键可能恰好精确匹配某个片段，
+        # 需要在下一次（包括自动重复的）KeyDown 时重新查表
+        snippets_stale = False
+        modifier_mask = (
+            kCGEventFlagMaskControl
+            | kCGEventFlagMaskCommand
+            | kCGEventFlagMaskAlternate
+            | kCGEventFlagMaskShift
+        )
+        # 待发送的信号 (信号类型, id, 参数)，每次 RunLoop 唤醒后统一发送
+        pending_emits: List[Tuple[str, str, str]] = []
+
+        def queue_emit(kind: str, item_id: str, arg: str) -> None:
+            """记录待发送的信号
+
+            同一批次内同一 id 先 press 后 release 时两者抵消，不再跨线程发送。
+            """
+            if arg == "release":
+                for i in range(len(pending_emits) - 1, -1, -1):
+                    if pending_emits[i] == (kind, item_id, "press"):
+                        del pending_emits[i]
+                        return
+            pending_emits.append((kind, item_id, arg))
+
+        def flush_emits() -> None:
+            """发送本批次累积的信号"""
+            if not pending_emits:
+                return
+            batch = pending_emits[:]
+            pending_emits.clear()
+            for kind, item_id, arg in batch:
+                if kind == "hotkey":
+                    self.hotkey_pressed.emit(item_id, arg)
+                elif kind == "mouse":
+                    self.mouse_button_event.emit(item_id, arg)
+                else:
+                    self.snippet_triggered.emit(item_id, arg)
 
         def get_modifier_names(flags: int) -> Set[str]:
             """从 Quartz 标志位获取修饰键名称
@@ -140,102 +246,99 @@ class MacOSHotkeyListenerThread(QThread):
             使用 macOS 原生名称：control, command, option, shift
             """
             modifiers = set()
-            if flags & Quartz.kCGEventFlagMaskControl:
+            if flags & kCGEventFlagMaskControl:
                 modifiers.add("control")
-            if flags & Quartz.kCGEventFlagMaskCommand:
+            if flags & kCGEventFlagMaskCommand:
                 modifiers.add("command")
-            if flags & Quartz.kCGEventFlagMaskAlternate:
+            if flags & kCGEventFlagMaskAlternate:
                 modifiers.add("option")
-            if flags & Quartz.kCGEventFlagMaskShift:
+            if flags & kCGEventFlagMaskShift:
                 modifiers.add("shift")
             return modifiers
 
-        def keycode_to_name(keycode: int) -> Optional[str]:
-            """将 macOS 虚拟键码转换为键名"""
-            keycode_map = {
-                0: "a", 1: "s", 2: "d", 3: "f", 4: "h", 5: "g", 6: "z", 7: "x",
-                8: "c", 9: "v", 11: "b", 12: "q", 13: "w", 14: "e", 15: "r",
-                16: "y", 17: "t", 18: "1", 19: "2", 20: "3", 21: "4", 22: "6",
-                23: "5", 24: "=", 25: "9", 26: "7", 27: "-", 28: "8", 29: "0",
-                31: "o", 32: "u", 34: "i", 35: "p", 37: "l", 38: "j", 40: "k",
-                45: "n", 46: "m",
-                36: "enter", 48: "tab", 49: "space", 51: "backspace", 53: "esc",
-                122: "f1", 120: "f2", 99: "f3", 118: "f4", 96: "f5", 97: "f6",
-                98: "f7", 100: "f8", 101: "f9", 109: "f10", 103: "f11", 111: "f12",
-            }
-            return keycode_map.get(keycode)
-
-        def check_hotkeys(all_pressed: Set[str]) -> None:
-            """检查是否触发了快捷键"""
-            for hotkey_id, config in self._config.keyboard_hotkeys.items():
-                if not config.enabled:
-                    continue
-
-                # 将配置的键名转换为 macOS 格式
-                required_keys = self._convert_keys_to_macos(config.keys)
-
-                if required_keys.issubset(all_pressed):
-                    if hotkey_id not in active_combos:
-                        active_combos[hotkey_id] = True
-                        LOG.debug(f"Hotkey triggered: {hotkey_id}, keys={required_keys}")
-
-                        if config.mode == "hold":
-                            self.hotkey_pressed.emit(hotkey_id, "press")
-                        else:
-                            self.hotkey_pressed.emit(hotkey_id, "toggle")
+        def check_hotkeys(all_pressed: Set[str], all_mask: int, new_keys: Iterable[str]) -> None:
+            """检查是否触发了快捷键
 
-            # 检查文本片段
-            for snip_id, snip_config in self._config.text_snippets.items():
-                if not snip_config.enabled:
-                    continue
+            只检查包含新按下键（new_keys）的快捷键，其余快捷键的匹配状态不会因此改变。
+            all_mask 为 all_pressed 的位掩码。
+            """
+            for key in new_keys:
+                for entry in index.hotkeys_by_key.get(key, ()):
+                    check_hotkey(entry, all_mask)
+
+            check_snippets(all_pressed)
+
+        def check_snippets(all_pressed: Set[str]) -> None:
+            """检查文本片段：精确匹配，直接按键集合查表"""
+            nonlocal snippets_stale
+            snippets_stale = False
+            if len(all_pressed) in index.snippet_sizes:
+                for snip_entry in index.snippets_by_combo.get(frozenset(all_pressed), ()):
+                    trigger_snippet(snip_entry)
+
+        def check_hotkey(entry, all_mask: int) -> None:
+            """检查单个快捷键是否触发"""
+            config = entry.config
+            hotkey_id = entry.hotkey_id
+            if (all_mask & entry.mask) == entry.mask:
+                if hotkey_id not in active_hotkeys:
+                    active_hotkeys.add(hotkey_id)
+                    LOG.debug(f"Hotkey triggered: {hotkey_id}, keys={entry.keys}")
 
-                required_keys = self._convert_keys_to_macos(snip_config.keys)
-                snip_key = f"snippet:{snip_id}"
+                    if config.mode == "hold":
+                        queue_emit("hotkey", hotkey_id, "press")
+                    else:
+                        queue_emit("hotkey", hotkey_id, "toggle")
 
-                if required_keys == all_pressed:
-                    if snip_key not in active_combos:
-                        active_combos[snip_key] = True
-                        self.snippet_triggered.emit(snip_id, snip_config.text)
+        def trigger_snippet(snip_entry) -> None:
+            """触发按键集合完全匹配的文本片段"""
+            snip_id = snip_entry.snippet_id
+            if snip_id not in active_snippets:
+                active_snippets.add(snip_id)
+                queue_emit("snippet", snip_id, snip_entry.config.text)
 
         def check_releases(released: Set[str], current: Set[str]) -> None:
             """检查是否释放了快捷键"""
-            to_remove = []
+            for key in released:
+                if active_hotkeys:
+                    for entry in index.hotkeys_by_key.get(key, ()):
+                        # 释放的键是已激活快捷键的一部分
+                        hotkey_id = entry.hotkey_id
+                        if hotkey_id not in active_hotkeys:
+                            continue
 
-            for hotkey_id, config in self._config.keyboard_hotkeys.items():
-                if hotkey_id not in active_combos:
-                    continue
+                        active_hotkeys.discard(hotkey_id)
+                        LOG.debug(f"Hotkey released: {hotkey_id}")
 
-                required_keys = self._convert_keys_to_macos(config.keys)
+                        if entry.config.mode == "hold":
+                            queue_emit("hotkey", hotkey_id, "release")
 
-                # 如果释放的键是快捷键的一部分
-                if not released.isdisjoint(required_keys):
-                    to_remove.append(hotkey_id)
-                    LOG.debug(f"Hotkey released: {hotkey_id}")
-
-                    if config.mode == "hold":
-                        self.hotkey_pressed.emit(hotkey_id, "release")
-
-            # 检查文本片段释放
-            for snip_id in list(active_combos.keys()):
-                if snip_id.startswith("snippet:"):
-                    real_id = snip_id[8:]
-                    snip_config = self._config.text_snippets.get(real_id)
-                    if snip_config:
-                        required_keys = self._convert_keys_to_macos(snip_config.keys)
-                        if not released.isdisjoint(required_keys):
-                            to_remove.append(snip_id)
-
-            for hk_id in to_remove:
-                if hk_id in active_combos:
-                    del active_combos[hk_id]
+                # 检查文本片段释放
+                if active_snippets:
+                    for snip_entry in index.snippets_by_key.get(key, ()):
+                        active_snippets.discard(snip_entry.snippet_id)
 
         def event_callback(proxy, event_type, event, refcon):
-            nonlocal last_modifiers, pressed_keys
+            nonlocal last_modifiers, last_flags, pressed_keys, snippets_stale
+            nonlocal pressed_mask
+
+            # 系统禁用 event tap 时会回调通知，此时立即重新启用
+            # （主循环阻塞等待，不再定时检查 tap 状态）
+            if event_type in (kCGEventTapDisabledByTimeout, kCGEventTapDisabledByUserInput):
+                LOG.warning("CGEventTap was disabled by system, re-enabling...")
+                if self._tap:
+                    CGEventTapEnable(self._tap, True)
+                return event
 
             try:
                 if event_type == kCGEventFlagsChanged:
                     # 修饰键状态变化
-                    flags = Quartz.CGEventGetFlags(event)
+                    # 左右成对的修饰键、CapsLock 等也会触发 FlagsChanged，
+                    # 关心的修饰键标志位没有变化时直接跳过
+                    flags = CGEventGetFlags(event) & modifier_mask
+                    if flags == last_flags:
+                        return event
+                    last_flags = flags
                     current_modifiers = get_modifier_names(flags)
 
                     # 检测新按下和释放的修饰键
@@ -246,62 +349,82 @@ class MacOSHotkeyListenerThread(QThread):
                     # 处理释放的修饰键
                     if released:
                         check_releases(released, current_modifiers)
+                        snippets_stale = True
 
                     # 更新按下的修饰键状态
                     pressed_keys -= {"control", "command", "option", "shift"}
                     pressed_keys |= current_modifiers
+                    pressed_mask = (pressed_mask & ~modifier_bits) | index.mask_of(
+                        current_modifiers
+                    )
 
                     # 如果有新按下的修饰键，检查快捷键
                     if newly_pressed:
-                        all_pressed = pressed_keys | current_modifiers
-                        check_hotkeys(all_pressed)
+                        check_hotkeys(pressed_keys, pressed_mask, newly_pressed)
 
                 elif event_type == kCGEventKeyDown:
                     # 普通按键按下
-                    keycode = Quartz.CGEventGetIntegerValueField(
-                        event, Quartz.kCGKeyboardEventKeycode
+                    keycode = CGEventGetIntegerValueField(
+                        event, kCGKeyboardEventKeycode
                     )
-                    key_name = keycode_to_name(keycode)
-                    if key_name:
+                    key_name = _keycode_to_name(keycode)
+                    if key_name and key_name in pressed_keys and CGEventGetIntegerValueField(
+                        event, kCGKeyboardEventAutorepeat
+                    ):
+                        # 按住不放时系统会持续发送自动重复的 KeyDown：按下的键没有增加，
+                        # 不会有新的快捷键匹配；只有期间释放过其他键时才重新检查文本片段
+                        if snippets_stale:
+                            check_snippets(pressed_keys | get_modifier_names(CGEventGetFlags(event)))
+                    elif key_name:
                         pressed_keys.add(key_name)
-                        flags = Quartz.CGEventGetFlags(event)
+                        pressed_mask |= index.key_bits.get(key_name, 0)
+                        flags = CGEventGetFlags(event)
                         modifiers = get_modifier_names(flags)
-                        check_hotkeys(pressed_keys | modifiers)
+                        if modifiers <= pressed_keys:
+                            # 修饰键通常已由 FlagsChanged 同步到 pressed_keys，无需再合并
+                            check_hotkeys(pressed_keys, pressed_mask, (key_name,))
+                        else:
+                            check_hotkeys(
+                                pressed_keys | modifiers,
+                                pressed_mask | index.mask_of(modifiers),
+                                (key_name,),
+                            )
 
                 elif event_type == kCGEventKeyUp:
                     # 普通按键释放
-                    keycode = Quartz.CGEventGetIntegerValueField(
-                        event, Quartz.kCGKeyboardEventKeycode
+                    keycode = CGEventGetIntegerValueField(
+                        event, kCGKeyboardEventKeycode
                     )
-                    key_name = keycode_to_name(keycode)
+                    key_name = _keycode_to_name(keycode)
                     if key_name:
-                        flags = Quartz.CGEventGetFlags(event)
+                        flags = CGEventGetFlags(event)
                         modifiers = get_modifier_names(flags)
                         check_releases({key_name}, modifiers)
+                        snippets_stale = True
                         pressed_keys.discard(key_name)
+                        pressed_mask &= ~index.key_bits.get(key_name, 0)
 
                 elif event_type == kCGEventOtherMouseDown:
                     # 鼠标其他按键按下
-                    button = Quartz.CGEventGetIntegerValueField(
-                        event, Quartz.kCGMouseEventButtonNumber
+                    button = CGEventGetIntegerValueField(
+                        event, kCGMouseEventButtonNumber
                     )
                     if button == 2:  # 中键
-                        for mb_id, cfg in self._config.mouse_hotkeys.items():
-                            if cfg.enabled and cfg.button == "middle":
-                                if cfg.mode == "hold":
-                                    self.mouse_button_event.emit(mb_id, "press")
-                                else:
-                                    self.mouse_button_event.emit(mb_id, "toggle")
+                        for mb_id, cfg in index.middle_button_hotkeys:
+                            if cfg.mode == "hold":
+                                queue_emit("mouse", mb_id, "press")
+                            else:
+                                queue_emit("mouse", mb_id, "toggle")
 
                 elif event_type == kCGEventOtherMouseUp:
                     # 鼠标其他按键释放
-                    button = Quartz.CGEventGetIntegerValueField(
-                        event, Quartz.kCGMouseEventButtonNumber
+                    button = CGEventGetIntegerValueField(
+                        event, kCGMouseEventButtonNumber
                     )
                     if button == 2:
-                        for mb_id, cfg in self._config.mouse_hotkeys.items():
-                            if cfg.enabled and cfg.button == "middle" and cfg.mode == "hold":
-                                self.mouse_button_event.emit(mb_id, "release")
+                        for mb_id, cfg in index.middle_button_hotkeys:
+                            if cfg.mode == "hold":
+                                queue_emit("mouse", mb_id, "release")
 
             except Exception as e:
                 LOG.error(f"Event callback error: {e}")
@@ -346,17 +469,26 @@ class MacOSHotkeyListenerThread(QThread):
         run_loop = CFRunLoopGetCurrent()
         CFRunLoopAddSource(run_loop, run_loop_source, kCFRunLoopCommonModes)
         CGEventTapEnable(self._tap, True)
+        self._run_loop = run_loop
 
         LOG.info("macOS Quartz hotkey listener started")
 
         # 主循环
         while not self._stop_event.is_set():
-            # 运行 RunLoop 一小段时间
-            Quartz.CFRunLoopRunInMode(Quartz.kCFRunLoopDefaultMode, 0.1, False)
+            # 阻塞等待下一个事件，stop() 会通过 CFRunLoopStop 唤醒
+            result = CFRunLoopRunInMode(kCFRunLoopDefaultMode, _RUN_LOOP_TIMEOUT, True)
+
+            # 继续处理已经就绪的事件，再统一发送本批次的信号
+            for _ in range(_MAX_EVENTS_PER_TICK):
+                if result != kCFRunLoopRunHandledSource:
+                    break
+                result = CFRunLoopRunInMode(kCFRunLoopDefaultMode, 0, True)
+            flush_emits()
 
             # 检查 event tap 是否被系统禁用，如果是则重新启用
             if self._tap and not CGEventTapIsEnabled(self._tap):
                 LOG.warning("CGEventTap was disabled by system, re-enabling...")
                 CGEventTapEnable(self._tap, True)
 
+        self._run_loop = None
         LOG.info("macOS Quartz hotkey listener stopped")
@@ -3,7 +3,7 @@
 import sys
 from typing import Optional
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
 
 from hotkey.config import GlobalHotkeySettings
 
@@ -80,10 +80,12 @@ class HotkeyManager(QObject):
 
         try:
             self._listener_thread = ListenerThread(self._config)
-            self._listener_thread.hotkey_pressed.connect(self._on_hotkey_event)
-            self._listener_thread.mouse_button_event.connect(self._on_mouse_event)
-            self._listener_thread.snippet_triggered.connect(self._on_snippet_triggered)
-            self._listener_thread.listener_error.connect(self._on_listener_error)
+            # 信号来自监听线程，显式使用队列连接，在 GUI 线程中处理
+            queued = Qt.ConnectionType.QueuedConnection
+            self._listener_thread.hotkey_pressed.connect(self._on_hotkey_event, queued)
+            self._listener_thread.mouse_button_event.connect(self._on_mouse_event, queued)
+            self._listener_thread.snippet_triggered.connect(self._on_snippet_triggered, queued)
+            self._listener_thread.listener_error.connect(self._on_listener_error, queued)
             self._listener_thread.start()
         except Exception as e:
             self.error_occurred.emit(f"启动快捷键监听失败: {e}")
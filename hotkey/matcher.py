@@ -0,0 +1,118 @@
+"""快捷键状态机
+
+维护按下状态和已激活的快捷键，根据按键事件给出需要发送的动作。
+不依赖 Qt 和 pynput，监听器回调中只需：键名转换 -> 调用一次 press/release -> 发送结果。
+"""
+
+from typing import List, Optional, Sequence, Set, Tuple
+
+from hotkey.index import HotkeyIndex
+
+# (类型, id, 参数)：("hotkey", hotkey_id, "press"/"release"/"toggle") 或 ("snippet", snippet_id, text)
+MatchEvent = Tuple[str, str, str]
+
+# 没有动作时返回的共享空结果（绝大多数按键不会触发任何动作）
+_NO_EVENTS: Tuple[MatchEvent, ...] = ()
+
+
+class HotkeyMatcher:
+    """基于 HotkeyIndex 的快捷键匹配状态机（仅在监听线程中使用，非线程安全）"""
+
+    __slots__ = (
+        "_index",
+        "_pressed_keys",
+        "_pressed_mask",
+        "_active_hotkeys",
+        "_active_snippets",
+    )
+
+    def __init__(self, index: HotkeyIndex) -> None:
+        self._index = index
+        self._pressed_keys: Set[str] = set()
+        self._pressed_mask = 0  # 按下键的位掩码（见 HotkeyIndex.key_bits）
+        self._active_hotkeys: Set[str] = set()  # 正在激活的组合键
+        self._active_snippets: Set[str] = set()  # 已触发、尚未释放的文本片段 id
+
+    def press(self, key_name: str) -> Sequence[MatchEvent]:
+        """处理按键按下，返回需要发送的动作"""
+        index = self._index
+        events: Optional[List[MatchEvent]] = None  # 第一次匹配时才创建
+
+        pressed_keys = self._pressed_keys
+        pressed_keys.add(key_name)
+        pressed_mask = self._pressed_mask | index.key_bits.get(key_name, 0)
+        self._pressed_mask = pressed_mask
+
+        # 只检查包含刚按下键的快捷键（其余快捷键的匹配状态不会因此改变）
+        active_hotkeys = self._active_hotkeys
+        for entry in index.hotkeys_by_key.get(key_name, ()):
+            if (pressed_mask & entry.mask) == entry.mask:
+                # 组合键匹配！
+                hotkey_id = entry.hotkey_id
+                if hotkey_id not in active_hotkeys:
+                    active_hotkeys.add(hotkey_id)
+                    # 按住模式发送 press，toggle 模式发送 toggle
+                    action = "press" if entry.config.mode == "hold" else "toggle"
+                    if events is None:
+                        events = []
+                    events.append(("hotkey", hotkey_id, action))
+
+        # 检查文本片段快捷键
+        # 精确匹配：按下的键必须完全等于配置的键，直接按键集合查表
+        if len(pressed_keys) in index.snippet_sizes:
+            active_snippets = self._active_snippets
+            for snip_entry in index.snippets_by_combo.get(frozenset(pressed_keys), ()):
+                # 片段快捷键触发（一次性，释放前不再重复触发）
+                snip_id = snip_entry.snippet_id
+                if snip_id not in active_snippets:
+                    active_snippets.add(snip_id)
+                    if events is None:
+                        events = []
+                    events.append(("snippet", snip_id, snip_entry.config.text))
+
+        return _NO_EVENTS if events is None else events
+
+    def release(self, key_name: str) -> Sequence[MatchEvent]:
+        """处理按键释放，返回需要发送的动作"""
+        index = self._index
+        events: Optional[List[MatchEvent]] = None  # 第一次匹配时才创建
+
+        key_bit = index.key_bits.get(key_name, 0)
+        # 除刚释放的键外仍处于按下状态的键
+        remaining_mask = self._pressed_mask & ~key_bit
+
+        # 检查是否释放了激活的组合键
+        active_hotkeys = self._active_hotkeys
+        if active_hotkeys:
+            for entry in index.hotkeys_by_key.get(key_name, ()):
+                hotkey_id = entry.hotkey_id
+                if hotkey_id not in active_hotkeys:
+                    continue
+
+                is_hold = entry.config.mode == "hold"
+                non_modifier_mask = entry.non_modifier_mask
+                if is_hold and non_modifier_mask:
+                    # 只允许非修饰键触发release，避免修饰键被清理导致误触发
+                    if not key_bit & non_modifier_mask:
+                        continue
+                    # 还有其他非修饰键按着时暂不释放
+                    if remaining_mask & non_modifier_mask:
+                        continue
+
+                # 释放了组合键的一部分
+                active_hotkeys.discard(hotkey_id)
+                if is_hold:
+                    # 按住模式 - 发送release事件
+                    if events is None:
+                        events = []
+                    events.append(("hotkey", hotkey_id, "release"))
+
+        # 清理片段快捷键的 active 状态
+        active_snippets = self._active_snippets
+        if active_snippets:
+            for snip_entry in index.snippets_by_key.get(key_name, ()):
+                active_snippets.discard(snip_entry.snippet_id)
+
+        self._pressed_keys.discard(key_name)
+        self._pressed_mask = remaining_mask
+        return _NO_EVENTS if events is None else events